@@ -19,26 +19,41 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import NamedTuple
 import aiohttp
-import async_timeout
 import asyncio
-import ssl
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later, async_track_time_change
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
-    UpdateFailed,
 )
 from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
 
 _LOGGER = logging.getLogger(__name__)
 
-DOMAIN = "tempo"
 API_URL = "https://www.services-rte.com/cms/open_data/v1/tempo"
+PARIS_TZ = dt_util.get_time_zone("Europe/Paris")
+API_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)
+ONE_DAY = timedelta(days=1)
+
+# Nouveaux essais en arrière-plan après un échec API (secondes)
+RETRY_DELAYS = (30, 120, 600)
+# Nouvel essai de la récupération J+1 de 7h en cas d'échec
+SCHEDULED_RETRY_DELAY = timedelta(minutes=30)
+SCHEDULED_RETRY_MAX = 3
+# Au-delà, les données en cache ne sont plus considérées comme fiables
+CACHE_MAX_AGE = timedelta(hours=48)
+
+# Heures creuses (22h-6h) : bit n à 1 si l'heure n est en HC
+HC_HOURS_MASK = sum(1 << hour for hour in (22, 23, 0, 1, 2, 3, 4, 5))
 
 COLORS = {
     "BLUE": {"code": 1, "name": "Bleu", "name_en": "blue", "emoji":"🔵"},
@@ -46,6 +61,31 @@ COLORS = {
     "RED": {"code": 3, "name": "Rouge", "name_en": "red","emoji":"🔴"},
 }
 
+# Table de correspondance directe : couleur -> (code, nom, nom anglais, emoji)
+COLOR_INFO = {
+    color: (info["code"], info["name"], info["name_en"], info["emoji"])
+    for color, info in COLORS.items()
+}
+UNKNOWN_COLOR_INFO = (0, "Inconnu", "unknown", "❓")
+
+# Code couleur -> (is_blue, is_white, is_red)
+COLOR_FLAGS = {
+    0: (False, False, False),
+    1: (True, False, False),
+    2: (False, True, False),
+    3: (False, False, True),
+}
+
+
+class TimeSnapshot(NamedTuple):
+    """Dates Tempo et période à un instant donné (heure de Paris)."""
+
+    today: str
+    tomorrow: str
+    hour: int
+    is_hc: bool
+    season: str
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -53,7 +93,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Configuration de l'entité depuis une config entry."""
-    coordinator = TempoDataCoordinator(hass)
+    coordinator = TempoDataCoordinator(hass, entry)
     await coordinator.async_config_entry_first_refresh()
 
     async_add_entities([TempoSensor(coordinator, entry)])
@@ -62,193 +102,223 @@ async def async_setup_entry(
 class TempoDataCoordinator(DataUpdateCoordinator):
     """Coordinateur pour récupérer les données Tempo."""
 
-    def __init__(self, hass: HomeAssistant) -> None:
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialisation du coordinateur."""
         super().__init__(
             hass,
             _LOGGER,
             name="Tempo",
             update_interval=None,  # Pas de mise à jour automatique, uniquement programmée
+            always_update=False,  # Notifie les entités uniquement si les données changent
         )
         self.tempo_data = {}
+        self.data_source = "cache"  # "api" ou "cache" selon la dernière mise à jour
         self._cached_data = {}  # Cache pour garder les dernières données valides
-        self._last_period = None
+        self._color_info = {}  # Table date -> (code, nom, nom anglais, emoji) issue du cache
+        self.data_version = 0  # Incrémenté à chaque reconstruction de _color_info
+        self._last_dispatch_key = None  # (période, J) lors de la dernière notification
         self._last_api_call = None
         self._data_fetched_today = False
-        
-        # Créer le contexte SSL en dehors de la boucle d'événements
-        self._ssl_context = ssl.create_default_context()
-        self._ssl_context.check_hostname = False
-        self._ssl_context.verify_mode = ssl.CERT_NONE
-
-        self._schedule_updates()
+        self._cache_timestamp = None  # Dernière récupération valide (UTC)
+        self._unsub_cache_expiry = None  # Expiration programmée du cache (48h)
+        self._retry_attempt = 0
+        self._unsub_retry = None  # Nouvel essai en arrière-plan programmé
+        self._scheduled_retry_count = 0
+        self._unsub_scheduled_retry = None  # Nouvel essai J+1 programmé
+        self._refresh_lock = asyncio.Lock()  # Une seule récupération programmée à la fois
+        self._date_cache = (None, None)  # (minute, instantané des dates/période)
+        self._conditional_url = None  # URL associée aux en-têtes conditionnels
+        self._conditional_headers = {}  # If-None-Match / If-Modified-Since
+        
+        # Session partagée de Home Assistant (pool de connexions keep-alive)
+        self._session = async_get_clientsession(hass)
+
+        self._schedule_updates(entry)
+        entry.async_on_unload(self._cancel_background_retry)
+        entry.async_on_unload(self._cancel_scheduled_retry)
+        entry.async_on_unload(self._cancel_cache_expiry)
 
    
 
-    def get_current_season(self) -> str:
-        """Retourne la saison actuelle (ex: 2024-2025)."""
-        now = dt_util.now().astimezone(dt_util.get_time_zone("Europe/Paris"))
+    @staticmethod
+    def _snapshot(now: datetime) -> TimeSnapshot:
+        """Calcule (J, J+1, heure, HC, saison) pour un instant donné à l'heure de Paris."""
+        hour = now.hour
         year = now.year
-        month = now.month
         
-        if month >= 9:
-            return f"{year}-{year + 1}"
-        return f"{year - 1}-{year}"
+        # Si avant 6h du matin, on considère que c'est encore la veille
+        tempo_day = now - ONE_DAY if hour < 6 else now
+        
+        return TimeSnapshot(
+            today=tempo_day.date().isoformat(),
+            tomorrow=(tempo_day + ONE_DAY).date().isoformat(),
+            hour=hour,
+            is_hc=bool(HC_HOURS_MASK >> hour & 1),
+            season=f"{year}-{year + 1}" if now.month >= 9 else f"{year - 1}-{year}",
+        )
+
+    def get_time_snapshot(self) -> TimeSnapshot:
+        """
+        Retourne (J, J+1, heure, HC, saison) à l'heure de Paris.
+        Recalculé au plus une fois par minute.
+        """
+        minute = int(time.time() // 60)
+        if self._date_cache[0] != minute:
+            now = dt_util.now(PARIS_TZ)
+            self._date_cache = (minute, self._snapshot(now))
+        return self._date_cache[1]
+
+    def get_current_season(self) -> str:
+        """Retourne la saison actuelle (ex: 2024-2025)."""
+        return self.get_time_snapshot().season
 
     def get_tempo_date(self, offset_days: int = 0) -> str:
         """
         Retourne la date Tempo (en tenant compte du décalage 6h).
         offset_days: 0 pour J, 1 pour J+1
         """
-        now = dt_util.now().astimezone(dt_util.get_time_zone("Europe/Paris"))
-        
-        # Si avant 6h du matin, on considère que c'est encore la veille
-        if now.hour < 6:
-            now = now - timedelta(days=1)
+        snapshot = self.get_time_snapshot()
+        if offset_days == 0:
+            return snapshot.today
+        if offset_days == 1:
+            return snapshot.tomorrow
         
-        target_date = now + timedelta(days=offset_days)
-        return target_date.strftime("%Y-%m-%d")
+        today = dt_util.parse_date(snapshot.today)
+        return (today + timedelta(days=offset_days)).isoformat()
+
+    @property
+    def today_str(self) -> str:
+        """Date Tempo J (YYYY-MM-DD)."""
+        return self.get_time_snapshot().today
+
+    @property
+    def tomorrow_str(self) -> str:
+        """Date Tempo J+1 (YYYY-MM-DD)."""
+        return self.get_time_snapshot().tomorrow
+
+    @property
+    def today_has_data(self) -> bool:
+        """Indique si la couleur J est connue (API ou cache)."""
+        return self.get_time_snapshot().today in self._color_info
+
+    def get_color_info(self, date: str) -> tuple:
+        """Retourne (code, nom, nom anglais, emoji) pour une date donnée (avec cache)."""
+        return self._color_info.get(date, UNKNOWN_COLOR_INFO)
 
     def get_color_code(self, date: str) -> int:
         """Retourne le code couleur pour une date donnée (avec cache)."""
-        # Essaie d'abord les données actuelles
-        color = self.tempo_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["code"]
-        
-        # Sinon, utilise le cache
-        color = self._cached_data.get(date, "")
-        if color and color in COLORS:
-            _LOGGER.debug(f"Utilisation du cache pour {date}: {color}")
-            return COLORS[color]["code"]
-        
-        return 0
+        return self.get_color_info(date)[0]
 
     def get_color_name(self, date: str) -> str:
         """Retourne le nom de la couleur pour une date donnée (avec cache)."""
-        color = self.tempo_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["name"]
-        
-        # Utilise le cache si disponible
-        color = self._cached_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["name"]
-        
-        return "Inconnu"
+        return self.get_color_info(date)[1]
 
     def get_color_name_en(self, date: str) -> str:
         """Retourne le nom anglais de la couleur pour une date donnée (avec cache)."""
-        color = self.tempo_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["name_en"]
-        
-        color = self._cached_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["name_en"]
-        
-        return "unknown"
+        return self.get_color_info(date)[2]
     
     def get_color_emoji(self, date: str) -> str:
         """Retourne l'emoji de la couleur pour une date donnée (avec cache)."""
-        color = self.tempo_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["emoji"]
-        
-        color = self._cached_data.get(date, "")
-        if color and color in COLORS:
-            return COLORS[color]["emoji"]
-        
-        return "❓"  # Changez "unknown" par un emoji
+        return self.get_color_info(date)[3]
+
+    def _rebuild_color_tables(self) -> None:
+        """
+        Pré-calcule (code, nom, nom anglais, emoji) par date à partir du cache.
+        Le cache contient toutes les couleurs valides de tempo_data.
+        """
+        self._color_info = {
+            date: COLOR_INFO[color] for date, color in self._cached_data.items()
+        }
+        self.data_version += 1
 
     def is_hc_time(self) -> bool:
         """Vérifie si on est en heures creuses (22h-6h)."""
-        now = dt_util.now().astimezone(dt_util.get_time_zone("Europe/Paris"))
-        hour = now.hour
-        return hour >= 22 or hour < 6
+        return self.get_time_snapshot().is_hc
 
     def get_period(self) -> str:
         """Retourne la période actuelle."""
         return "HC" if self.is_hc_time() else "HP"
 
-    def _schedule_updates(self):
-        """Programme les mises à jour aux heures clés."""
-        from homeassistant.helpers.event import async_track_time_change
-        
-        # À 6h : passage HP + activation des détecteurs J
-        async_track_time_change(
+    def _schedule_updates(self, entry: ConfigEntry):
+        """Programme les mises à jour aux heures clés (annulées au déchargement)."""
+        # À 6h : passage HP + activation des détecteurs J / à 22h : passage HC
+        entry.async_on_unload(async_track_time_change(
             self.hass,
             self._trigger_period_change,
-            hour=6,
+            hour=[6, 22],
             minute=0,
             second=0
-        )
+        ))
         
         # À 7h : récupération API pour couleur J+1
-        async_track_time_change(
+        entry.async_on_unload(async_track_time_change(
             self.hass,
             self._trigger_api_refresh,
             hour=7,
             minute=0,
             second=0
-        )
-        
-        # À 8h : retry si échec à 7h
-        async_track_time_change(
-            self.hass,
-            self._trigger_api_retry,
-            hour=8,
-            minute=0,
-            second=0
-        )
-        
-        # À 22h : passage HC
-        async_track_time_change(
-            self.hass,
-            self._trigger_period_change,
-            hour=22,
-            minute=0,
-            second=0
-        )
+        ))
         
-        _LOGGER.info("Mises à jour programmées: 6h (J HP), 7h (API J+1), 8h (retry), 22h (J HC)")
+        _LOGGER.info("Mises à jour programmées: 6h (J HP), 7h (API J+1), 22h (J HC)")
 
     async def _trigger_period_change(self, _now=None):
         """Changement de période HP/HC ou de jour."""
-        now = dt_util.now().astimezone(dt_util.get_time_zone("Europe/Paris"))
-        current_period = self.get_period()
+        snapshot = self.get_time_snapshot()
+        current_period = "HC" if snapshot.is_hc else "HP"
         
-        if now.hour == 6:
+        if snapshot.hour == 6:
             _LOGGER.info("6h - Passage au jour J en mode HP")
             self._data_fetched_today = False  # Reset pour permettre la récupération à 7h
-        elif now.hour == 22:
+        elif snapshot.hour == 22:
             _LOGGER.info("22h - Passage en heures creuses (HC)")
         
-        if self._last_period != current_period:
-            self._last_period = current_period
+        # Met à jour les entités (sans appel API) uniquement si la période ou le jour a changé
+        dispatch_key = (current_period, self.today_str)
+        if dispatch_key == self._last_dispatch_key:
+            return
         
-        # Force la mise à jour des entités (sans appel API)
-        self.async_set_updated_data(self.tempo_data)
+        self._last_dispatch_key = dispatch_key
+        self.async_update_listeners()
 
     async def _trigger_api_refresh(self, _now=None):
-        """Récupération API à 7h pour couleur J+1."""
-        now = dt_util.now().astimezone(dt_util.get_time_zone("Europe/Paris"))
-        today_date = now.strftime("%Y-%m-%d")
+        """Récupération API à 7h pour couleur J+1, avec nouvel essai toutes les 30 min."""
+        self._unsub_scheduled_retry = None
+        
+        # Attend la fin d'un éventuel nouvel essai en arrière-plan en cours
+        async with self._refresh_lock:
+            today_date = self.get_time_snapshot().today
+            
+            # Évite les appels multiples le même jour
+            if self._last_api_call == today_date and self._data_fetched_today:
+                _LOGGER.info("Données J+1 déjà récupérées aujourd'hui, skip")
+                return
+            
+            _LOGGER.info("Récupération API pour couleur J+1")
+            self._last_api_call = today_date
+            await self.async_refresh()
         
-        # Évite les appels multiples le même jour
-        if self._last_api_call == today_date and self._data_fetched_today:
-            _LOGGER.info("Données J+1 déjà récupérées aujourd'hui, skip")
+        if self._data_fetched_today:
+            self._scheduled_retry_count = 0
             return
         
-        _LOGGER.info("7h - Récupération API pour couleur J+1")
-        self._last_api_call = today_date
-        await self.async_refresh()
+        if self._scheduled_retry_count >= SCHEDULED_RETRY_MAX:
+            _LOGGER.warning("Échec de la récupération J+1 après %s essais", SCHEDULED_RETRY_MAX + 1)
+            self._scheduled_retry_count = 0
+            return
+        
+        self._scheduled_retry_count += 1
+        _LOGGER.info("Nouvel essai J+1 dans %s", SCHEDULED_RETRY_DELAY)
+        self._unsub_scheduled_retry = async_call_later(
+            self.hass, SCHEDULED_RETRY_DELAY, self._trigger_api_refresh
+        )
 
-    async def _trigger_api_retry(self, _now=None):
-        """Retry à 8h si échec à 7h."""
-        if not self._data_fetched_today:
-            _LOGGER.info("8h - Retry récupération API (échec à 7h)")
-            await self.async_refresh()
+    @callback
+    def _cancel_scheduled_retry(self) -> None:
+        """Annule le nouvel essai J+1 programmé."""
+        if self._unsub_scheduled_retry is not None:
+            self._unsub_scheduled_retry()
+            self._unsub_scheduled_retry = None
+        self._scheduled_retry_count = 0
 
     def _validate_and_cache_data(self, new_data: dict) -> bool:
         """Valide les nouvelles données et met à jour le cache si valides."""
@@ -264,77 +334,194 @@ class TempoDataCoordinator(DataUpdateCoordinator):
         tomorrow_color = new_data.get(tomorrow)
         
         if not today_color or today_color not in COLORS:
-            _LOGGER.warning(f"Couleur invalide pour J ({today}): {today_color}")
+            _LOGGER.warning("Couleur invalide pour J (%s): %s", today, today_color)
             return False
         
         # J+1 peut ne pas encore être disponible (avant 7h)
         if tomorrow_color and tomorrow_color not in COLORS:
-            _LOGGER.warning(f"Couleur invalide pour J+1 ({tomorrow}): {tomorrow_color}")
+            _LOGGER.warning("Couleur invalide pour J+1 (%s): %s", tomorrow, tomorrow_color)
         
         # Mise à jour du cache avec les données valides
-        for date, color in new_data.items():
-            if color in COLORS:
-                self._cached_data[date] = color
+        self._cached_data.update(
+            {date: color for date, color in new_data.items() if color in COLORS}
+        )
+        self._rebuild_color_tables()
+        self._cache_timestamp = dt_util.utcnow()
+        self._schedule_cache_expiry()
         
-        _LOGGER.info(f"Cache mis à jour - J: {today_color}, J+1: {tomorrow_color if tomorrow_color else 'N/A'}")
+        _LOGGER.info("Cache mis à jour - J: %s, J+1: %s", today_color, tomorrow_color or "N/A")
         return True
 
+    def _store_conditional_headers(self, url: str, response_headers) -> None:
+        """Mémorise ETag / Last-Modified pour la prochaine requête conditionnelle."""
+        headers = {}
+        if etag := response_headers.get("ETag"):
+            headers["If-None-Match"] = etag
+        if last_modified := response_headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = last_modified
+        
+        self._conditional_url = url
+        self._conditional_headers = headers
+
+    def _set_data_source(self, source: str) -> None:
+        """
+        Met à jour la provenance des données.
+        Notifie les entités si elle change, même lorsque les données renvoyées sont identiques.
+        """
+        if source == self.data_source:
+            return
+        
+        self.data_source = source
+        self.async_update_listeners()
+
+    def has_fresh_cache(self) -> bool:
+        """Indique si le cache provient d'une récupération valide de moins de 48h."""
+        return (
+            self._cache_timestamp is not None
+            and dt_util.utcnow() - self._cache_timestamp < CACHE_MAX_AGE
+        )
+
+    def _schedule_cache_expiry(self) -> None:
+        """Programme la notification des entités quand le cache atteint 48h."""
+        self._cancel_cache_expiry()
+        self._unsub_cache_expiry = async_call_later(
+            self.hass, CACHE_MAX_AGE, self._handle_cache_expiry
+        )
+
+    @callback
+    def _handle_cache_expiry(self, _now=None) -> None:
+        """Le cache a expiré : les entités deviennent indisponibles."""
+        self._unsub_cache_expiry = None
+        _LOGGER.warning("Aucune donnée valide depuis %s, sensor indisponible", CACHE_MAX_AGE)
+        self.async_update_listeners()
+
+    @callback
+    def _cancel_cache_expiry(self) -> None:
+        """Annule l'expiration programmée du cache."""
+        if self._unsub_cache_expiry is not None:
+            self._unsub_cache_expiry()
+            self._unsub_cache_expiry = None
+
+    def _schedule_background_retry(self) -> None:
+        """Programme un nouvel essai après un échec (30 s, 2 min puis 10 min)."""
+        if self._unsub_retry is not None:
+            return
+        
+        if self._retry_attempt >= len(RETRY_DELAYS):
+            # Abandon jusqu'au prochain déclenchement programmé
+            _LOGGER.warning("Échec des nouveaux essais API, conservation du cache")
+            self._retry_attempt = 0
+            return
+        
+        delay = RETRY_DELAYS[self._retry_attempt]
+        self._retry_attempt += 1
+        _LOGGER.info("Nouvel essai de récupération API dans %s s", delay)
+        self._unsub_retry = async_call_later(self.hass, delay, self._background_retry)
+
+    async def _background_retry(self, _now=None):
+        """Nouvel essai de récupération en arrière-plan."""
+        self._unsub_retry = None
+        
+        async with self._refresh_lock:
+            # Une récupération concurrente a pu réussir pendant l'attente
+            if self.data_source == "api":
+                return
+            await self.async_refresh()
+
+    @callback
+    def _cancel_background_retry(self) -> None:
+        """Annule le nouvel essai programmé et réinitialise le backoff."""
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+        self._retry_attempt = 0
+
     async def _async_update_data(self):
         """Récupération des données depuis l'API RTE."""
         season = self.get_current_season()
         url = f"{API_URL}?season={season}"
+        
+        # Requête conditionnelle si on a déjà reçu cette ressource
+        headers = self._conditional_headers if url == self._conditional_url else None
 
         try:
-            # Utiliser le contexte SSL pré-créé
-            connector = aiohttp.TCPConnector(ssl=self._ssl_context)
-            
-            async with async_timeout.timeout(15):
-                async with aiohttp.ClientSession(connector=connector) as session:
-                    async with session.get(url) as response:
-                        if response.status != 200:
-                            _LOGGER.error(f"Erreur API HTTP {response.status}")
-                            # En cas d'erreur, on garde les données du cache
-                            return self._cached_data
-                        
-                        data = await response.json()
-                        new_data = data.get("values", {})
-                        
-                        # Valide et met en cache les données
-                        if self._validate_and_cache_data(new_data):
-                            self.tempo_data = new_data
-                            self._data_fetched_today = True
-                            
-                            today = self.get_tempo_date(0)
-                            tomorrow = self.get_tempo_date(1)
-                            
-                            _LOGGER.info(
-                                "✓ Données Tempo récupérées: J=%s (%s), J+1=%s (%s)",
-                                self.get_color_name(today),
-                                self.get_color_code(today),
-                                self.get_color_name(tomorrow),
-                                self.get_color_code(tomorrow)
-                            )
-                        else:
-                            _LOGGER.warning("Données invalides, conservation du cache")
-                            # On garde les données du cache
-                            return self._cached_data
-                        
-                        return self.tempo_data
-                        
+            async with self._session.get(url, headers=headers, timeout=API_TIMEOUT) as response:
+                if response.status == 304:
+                    # Données inchangées depuis le dernier appel
+                    _LOGGER.debug("Données Tempo inchangées (HTTP 304)")
+                    new_data = self.tempo_data
+                elif response.status != 200:
+                    _LOGGER.error("Erreur API HTTP %s", response.status)
+                    # En cas d'erreur, on garde les données du cache
+                    self._schedule_background_retry()
+                    self._set_data_source("cache")
+                    return dict(self._cached_data)
+                else:
+                    data = await response.json(loads=json_loads)
+                    new_data = data.get("values", {})
+                
+                # Valide et met en cache les données
+                if self._validate_and_cache_data(new_data):
+                    self.tempo_data = new_data
+                    self._set_data_source("api")
+                    if response.status == 200:
+                        self._store_conditional_headers(url, response.headers)
+                    self._data_fetched_today = True
+                    self._cancel_background_retry()
+                    self._cancel_scheduled_retry()
+                    
+                    today = self.today_str
+                    tomorrow = self.tomorrow_str
+                    
+                    _LOGGER.info(
+                        "✓ Données Tempo récupérées: J=%s (%s), J+1=%s (%s)",
+                        self.get_color_name(today),
+                        self.get_color_code(today),
+                        self.get_color_name(tomorrow),
+                        self.get_color_code(tomorrow)
+                    )
+                else:
+                    _LOGGER.warning("Données invalides, conservation du cache")
+                    # On garde les données du cache
+                    self._set_data_source("cache")
+                    return dict(self._cached_data)
+                
+                return self.tempo_data
+                
         except asyncio.TimeoutError:
             _LOGGER.error("Timeout lors de la récupération des données API")
-            return self._cached_data
         except aiohttp.ClientError as err:
-            _LOGGER.error(f"Erreur de connexion API: {err}")
-            return self._cached_data
-        except Exception as err:
-            _LOGGER.error(f"Erreur inattendue: {err}", exc_info=True)
-            return self._cached_data
+            _LOGGER.error("Erreur de connexion API: %s", err)
+        except ValueError as err:
+            _LOGGER.error("Réponse API invalide: %s", err)
+        
+        # Sert le cache immédiatement et réessaie en arrière-plan
+        self._schedule_background_retry()
+        self._set_data_source("cache")
+        return dict(self._cached_data)
 
 
 class TempoSensor(CoordinatorEntity, SensorEntity):
     """Sensor principal représentant l'état Tempo."""
 
+    # Attributs dérivés de today_color_code / tomorrow_color_code / is_hc :
+    # exposés pour les automatisations mais non enregistrés dans l'historique
+    _unrecorded_attributes = frozenset({
+        "is_hp",
+        "today_is_blue",
+        "today_is_white",
+        "today_is_red",
+        "tomorrow_is_blue",
+        "tomorrow_is_white",
+        "tomorrow_is_red",
+        "today_is_red_hp",
+        "today_is_red_hc",
+        "today_is_white_hp",
+        "today_is_white_hc",
+        "today_is_blue_hp",
+        "today_is_blue_hc",
+    })
+
     def __init__(self, coordinator: TempoDataCoordinator, entry: ConfigEntry) -> None:
         """Initialisation du sensor."""
         super().__init__(coordinator)
@@ -344,57 +531,81 @@ class TempoSensor(CoordinatorEntity, SensorEntity):
         self._attr_icon = "mdi:flash"
         self._attr_has_entity_name = True
         self._last_state = None
+        self._last_state_key = None
+        self._cached_attributes = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Recalcule les attributs une seule fois avant de publier l'état."""
+        self._cached_attributes = self._build_attributes()
+        super()._handle_coordinator_update()
 
     @property
     def available(self) -> bool:
-        """Le sensor est disponible si on a au moins des données en cache."""
-        today = self.coordinator.get_tempo_date(0)
-        return self.coordinator.get_color_code(today) != 0
+        """Le sensor est disponible si on a des données en cache de moins de 48h."""
+        return self.coordinator.today_has_data and self.coordinator.has_fresh_cache()
 
     @property
     def native_value(self) -> str:
         """Retourne l'état actuel (couleur du jour actuel)."""
-        today = self.coordinator.get_tempo_date(0)
-        color_name = self.coordinator.get_color_name(today)
-        period = self.coordinator.get_period()
+        coordinator = self.coordinator
+        today = coordinator.today_str
+        period = coordinator.get_period()
         
-        new_state = f"{color_name} {period}"
+        # Réutilise l'état précédent si ni le jour, ni la période, ni les données n'ont changé
+        key = (today, period, coordinator.data_version)
+        if key == self._last_state_key:
+            return self._last_state
         
-        # Log uniquement si l'état change réellement
-        if new_state != self._last_state and self._last_state is not None:
-            _LOGGER.info(f"Changement d'état: {self._last_state} → {new_state}")
+        new_state = f"{coordinator.get_color_name(today)} {period}"
         
+        # Log uniquement si l'état change réellement
+        if (
+            self._last_state is not None
+            and new_state != self._last_state
+            and _LOGGER.isEnabledFor(logging.INFO)
+        ):
+            _LOGGER.info("Changement d'état: %s → %s", self._last_state, new_state)
+        
+        self._last_state_key = key
         self._last_state = new_state
         return new_state
 
     @property
     def extra_state_attributes(self):
-        """Attributs détaillés de l'entité."""
-        now = dt_util.now().astimezone(dt_util.get_time_zone("Europe/Paris"))
-        today = self.coordinator.get_tempo_date(0)
-        tomorrow = self.coordinator.get_tempo_date(1)
-        
-        today_color_code = self.coordinator.get_color_code(today)
-        tomorrow_color_code = self.coordinator.get_color_code(tomorrow)
-        
-        today_color = self.coordinator.get_color_name(today)
-        tomorrow_color = self.coordinator.get_color_name(tomorrow)
-        
-        today_color_en = self.coordinator.get_color_name_en(today)
-        tomorrow_color_en = self.coordinator.get_color_name_en(tomorrow)
-        
-        today_color_emoji = self.coordinator.get_color_emoji(today)
-        tomorrow_color_emoji = self.coordinator.get_color_emoji(tomorrow)
+        """Attributs détaillés de l'entité (calculés à la mise à jour du coordinateur)."""
+        if self._cached_attributes is None:
+            self._cached_attributes = self._build_attributes()
+        return self._cached_attributes
+
+    def _build_attributes(self) -> dict:
+        """Construit le dictionnaire des attributs."""
+        snapshot = self.coordinator.get_time_snapshot()
+        hour = snapshot.hour
+        is_hc = snapshot.is_hc
+        season = snapshot.season
+        today = self.coordinator.today_str
+        tomorrow = self.coordinator.tomorrow_str
+        
+        (
+            today_color_code, today_color, today_color_en, today_color_emoji
+        ) = self.coordinator.get_color_info(today)
+        (
+            tomorrow_color_code, tomorrow_color, tomorrow_color_en, tomorrow_color_emoji
+        ) = self.coordinator.get_color_info(tomorrow)
 
-        is_hc = self.coordinator.is_hc_time()
         period = "HC" if is_hc else "HP"
+        is_hp = not is_hc
+        
+        today_is_blue, today_is_white, today_is_red = COLOR_FLAGS[today_color_code]
+        tomorrow_is_blue, tomorrow_is_white, tomorrow_is_red = COLOR_FLAGS[tomorrow_color_code]
         
         return {
             # État actuel
-            "current_hour": now.hour,
+            "current_hour": hour,
             "current_period": period,
             "is_hc": is_hc,
-            "is_hp": not is_hc,
+            "is_hp": is_hp,
             
             # Jour J
             "today_date": today,
@@ -402,9 +613,9 @@ class TempoSensor(CoordinatorEntity, SensorEntity):
             "today_color_en": today_color_en,
             "today_color_code": today_color_code,
             "today_color_emoji":today_color_emoji,
-            "today_is_blue": today_color_code == 1,
-            "today_is_white": today_color_code == 2,
-            "today_is_red": today_color_code == 3,
+            "today_is_blue": today_is_blue,
+            "today_is_white": today_is_white,
+            "today_is_red": today_is_red,
             
             # Jour J+1
             "tomorrow_date": tomorrow,
@@ -412,21 +623,21 @@ class TempoSensor(CoordinatorEntity, SensorEntity):
             "tomorrow_color_en": tomorrow_color_en,
             "tomorrow_color_code": tomorrow_color_code,
             "tomorrow_color_emoji":tomorrow_color_emoji,
-            "tomorrow_is_blue": tomorrow_color_code == 1,
-            "tomorrow_is_white": tomorrow_color_code == 2,
-            "tomorrow_is_red": tomorrow_color_code == 3,
+            "tomorrow_is_blue": tomorrow_is_blue,
+            "tomorrow_is_white": tomorrow_is_white,
+            "tomorrow_is_red": tomorrow_is_red,
             
             # Combinaisons pratiques pour automatisations J (dépendent de l'heure actuelle)
-            "today_is_red_hp": today_color_code == 3 and not is_hc,
-            "today_is_red_hc": today_color_code == 3 and is_hc,
-            "today_is_white_hp": today_color_code == 2 and not is_hc,
-            "today_is_white_hc": today_color_code == 2 and is_hc,
-            "today_is_blue_hp": today_color_code == 1 and not is_hc,
-            "today_is_blue_hc": today_color_code == 1 and is_hc,
+            "today_is_red_hp": today_is_red and is_hp,
+            "today_is_red_hc": today_is_red and is_hc,
+            "today_is_white_hp": today_is_white and is_hp,
+            "today_is_white_hc": today_is_white and is_hc,
+            "today_is_blue_hp": today_is_blue and is_hp,
+            "today_is_blue_hc": today_is_blue and is_hc,
             
             # Saison
-            "season": self.coordinator.get_current_season(),
+            "season": season,
             
             # Info système
-            "data_source": "cache" if today not in self.coordinator.tempo_data else "api",
-        }
\ No newline at end of file
+            "data_source": self.coordinator.data_source,
+        }